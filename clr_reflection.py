@@ -0,0 +1,70 @@
+# clr_reflection.py
+# Reflection helpers shared by inspect_dll.py, inspect_dotnet_types.py and
+# test_sterling_wrapper_reflection.py.
+import os
+import clr
+import System
+from System import Reflection
+
+_search_dirs = []  # directories of assemblies loaded through reflection_only_load
+_resolver_installed = False
+
+
+def loadable_types(asm):
+    """All types of ``asm`` that load; one broken type does not discard the rest."""
+    try:
+        return list(asm.GetTypes())
+    except Reflection.ReflectionTypeLoadException as e:
+        return [t for t in e.Types if t is not None]
+
+
+def exported_types(asm):
+    """Public types of ``asm``, like GetExportedTypes() but tolerant of unloadable types."""
+    return [t for t in loadable_types(asm) if t.IsVisible]
+
+
+def _already_loaded(full_name):
+    for loaded in System.AppDomain.CurrentDomain.ReflectionOnlyGetAssemblies():
+        if loaded.FullName == full_name:
+            return loaded
+    return None
+
+
+def _resolve(sender, args):
+    # Reflection-only loads do not probe for dependencies: reuse a loaded match, then look
+    # beside the requester (the event may not name one) and the loaded paths, then the GAC.
+    loaded = _already_loaded(args.Name)
+    if loaded is not None:
+        return loaded
+    dirs = list(_search_dirs)
+    requester = args.RequestingAssembly
+    if requester is not None and requester.Location:
+        dirs.insert(0, os.path.dirname(requester.Location))
+    name = Reflection.AssemblyName(args.Name).Name + ".dll"
+    for d in dirs:
+        local = os.path.join(d, name)
+        if os.path.isfile(local):
+            return Reflection.Assembly.ReflectionOnlyLoadFrom(local)
+    try:
+        return Reflection.Assembly.ReflectionOnlyLoad(args.Name)
+    except Exception:
+        return None  # let the CLR report the unresolved reference
+
+
+def reflection_only_load(path):
+    """Load ``path`` for metadata only.
+
+    Reflection-only loading accepts each assembly identity once, so a second copy of an
+    already loaded identity returns the first one; compare ``Location`` to tell.
+    """
+    global _resolver_installed
+    if not _resolver_installed:
+        System.AppDomain.CurrentDomain.ReflectionOnlyAssemblyResolve += _resolve
+        _resolver_installed = True
+    loaded = _already_loaded(Reflection.AssemblyName.GetAssemblyName(path).FullName)
+    if loaded is not None:
+        return loaded
+    folder = os.path.dirname(os.path.abspath(path))
+    if folder not in _search_dirs:
+        _search_dirs.append(folder)
+    return Reflection.Assembly.ReflectionOnlyLoadFrom(path)
@@ -1,6 +1,5 @@
-﻿import pythoncom, win32com.client, traceback
+﻿import pythoncom, win32com.client
 
-pythoncom.CoInitialize()
 candidates = [
     "Sterling.STIAccountControl",
     "Sterling.STIOrder",
@@ -9,12 +8,16 @@ candidates = [
     "StiGuiDll.StiGui",   # guesses; vendor names vary
 ]
 
-for p in candidates:
-    try:
-        obj = win32com.client.Dispatch(p)
-        print("DISPATCH OK:", p, "->", obj)
-    except Exception as e:
-        print("DISPATCH FAIL:", p, ":", e)
-        traceback.print_exc()
+if __name__ == "__main__":
+    pythoncom.CoInitialize()
+    for p in candidates:
+        try:
+            obj = win32com.client.Dispatch(p)
+            print("DISPATCH OK:", p, "->", obj)
+            break
+        except Exception as e:
+            print("DISPATCH FAIL:", p, ":", e)
+            import traceback
+            traceback.print_exc()
 
-pythoncom.CoUninitialize()
+    pythoncom.CoUninitialize()
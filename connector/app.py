@@ -1,18 +1,45 @@
-﻿from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+﻿import asyncio
+import functools
+import logging
+import os
+import re
+import msgspec
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse
+from starlette.middleware.gzip import GZipMiddleware
+from connector.config_loader import load_config
+from connector.logger import configure_logging
 from connector.sterling_connector import SterlingConnector
-from typing import Optional
+from connector.sterling_singleton import get_sterling
+from typing import Annotated, Optional
 
-app = FastAPI(title="Sterling Connector API", version="1.0")
+LOG = logging.getLogger("app")
 
-sterling: Optional[SterlingConnector] = None
+app = FastAPI(
+    title="Sterling Connector API",
+    version="1.0",
+    default_response_class=ORJSONResponse,
+)
+# Only bodies over 1 KB (e.g. positions_raw dumps) are worth compressing; order acks stay raw.
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
+# Most orders submitted back-to-back in one COM-thread job, queued or batched.
+ORDER_BATCH_MAX = 32
 
 # ============================================================
 # MODELS
 # ============================================================
 
-class UnifiedOrderRequest(BaseModel):
+class _OrderRequest(msgspec.Struct, kw_only=True):
+    """Shared by the order models, which both declare ``ord_disp`` and ``ord_tif``."""
+
+    def __post_init__(self):
+        # Normalize explicit nulls/blanks once so the dispatch path passes fields through.
+        self.ord_disp = self.ord_disp or 0
+        self.ord_tif = self.ord_tif or "D"
+
+
+class UnifiedOrderRequest(_OrderRequest, kw_only=True):
     account: str
     symbol: str
     ord_size: int
@@ -24,7 +51,11 @@ class UnifiedOrderRequest(BaseModel):
     ord_type: Optional[str] = None
 
 
-class StopOrderRequest(BaseModel):
+class BatchOrderRequest(msgspec.Struct, kw_only=True):
+    orders: Annotated[list[UnifiedOrderRequest], msgspec.Meta(max_length=ORDER_BATCH_MAX)]
+
+
+class StopOrderRequest(_OrderRequest, kw_only=True):
     account: str
     symbol: str
     ord_size: int
@@ -36,165 +67,302 @@ class StopOrderRequest(BaseModel):
     ord_tif: Optional[str] = "D"
 
 
-class CancelRequest(BaseModel):
+class CancelRequest(msgspec.Struct, kw_only=True):
     account: str
     order_id: str
 
 
-class ReplaceRequest(BaseModel):
+class ReplaceRequest(msgspec.Struct, kw_only=True):
     order_id: str
     new_qty: int
     new_price: float
 
 
+_ERROR_PATH = re.compile(r"\.(\w+)|\[(\d+)\]")
+
+
+def _error_detail(e):
+    """Shape a msgspec error like FastAPI's validation 422: a list of {loc, msg, type}."""
+    msg, _, path = str(e).partition(" - at `")
+    loc = ["body"] + [int(index) if index else field for field, index in _ERROR_PATH.findall(path)]
+    if not isinstance(e, msgspec.ValidationError):
+        kind = "value_error.jsondecode"
+    elif msg.startswith("Object missing required field"):
+        loc.append(msg.split("`")[1])
+        kind = "value_error.missing"
+    else:
+        kind = "type_error"
+    return [{"loc": loc, "msg": msg, "type": kind}]
+
+
+def _inline_refs(node, defs):
+    if isinstance(node, dict):
+        ref = node.get("$ref")
+        if ref is not None:
+            return _inline_refs(defs[ref.rsplit("/", 1)[1]], defs)
+        return {k: _inline_refs(v, defs) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_inline_refs(v, defs) for v in node]
+    return node
+
+
+def _request_body(model):
+    """OpenAPI ``requestBody`` for a route whose body ``_body`` decodes (FastAPI cannot see it)."""
+    schema = msgspec.json.schema(model)
+    # msgspec puts nested models under $defs; OpenAPI 3.0 has no $defs, so inline them.
+    schema = _inline_refs(schema, schema.pop("$defs", {}))
+    return {"requestBody": {"content": {"application/json": {"schema": schema}}, "required": True}}
+
+
+def _body(model):
+    """Decode the raw JSON body straight into ``model`` with a reusable msgspec decoder."""
+    # Lax mode keeps the pydantic coercions clients rely on, e.g. "ord_size": "1".
+    decoder = msgspec.json.Decoder(model, strict=False)
+
+    async def decode(request: Request):
+        try:
+            return decoder.decode(await request.body())
+        except msgspec.DecodeError as e:
+            raise HTTPException(status_code=422, detail=_error_detail(e))
+    return decode
+
+
+# ============================================================
+# ORDER DISPATCH
+# ============================================================
+
+def _market_args(req):
+    return (req.account, req.symbol, req.ord_size, req.ord_disp,
+            req.ord_route, req.ord_side, req.ord_tif)
+
+
+def _limit_args(req):
+    return (req.account, req.symbol, req.ord_size, req.ord_disp,
+            req.ord_route, req.ord_price, req.ord_side, req.ord_tif)
+
+
+def _stop_args(req):
+    return (req.account, req.symbol, req.ord_size, req.ord_disp,
+            req.ord_route, req.stop_price, req.ord_side, req.ord_tif)
+
+
+def _stoplimit_args(req):
+    return (req.account, req.symbol, req.ord_size, req.ord_disp,
+            req.ord_route, req.stop_price, req.limit_price,
+            req.ord_side, req.ord_tif)
+
+
+# order kind -> (SterlingConnector method, positional-argument builder)
+_DISPATCH = {
+    "market": (SterlingConnector.send_market, _market_args),
+    "limit": (SterlingConnector.send_limit, _limit_args),
+    "stop": (SterlingConnector.send_stop, _stop_args),
+    "stop_limit": (SterlingConnector.send_stoplimit, _stoplimit_args),
+}
+
+
+def _order_kind(req):
+    is_market = (
+        req.ord_type == "M"
+        or req.ord_price is None
+        or req.ord_price == 0.0
+    )
+    return "market" if is_market else "limit"
+
+
+def _order_ack(kind, req, result):
+    body = {
+        "order_type": kind,
+        "order_id": result,
+        "symbol": req.symbol,
+        "side": req.ord_side,
+        "quantity": req.ord_size
+    }
+    if kind == "limit":
+        body["price"] = req.ord_price
+    return body
+
+
+async def _call(fn, *args):
+    """Run a blocking Sterling call on the connector's COM thread, off the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(get_sterling().executor, fn, *args)
+
+
+def _run_orders(conn, orders):
+    """Executor job: submit ``(send, args)`` orders back-to-back, returning one (ok, value) each."""
+    outcomes = []
+    for send, args in orders:
+        try:
+            outcomes.append((True, send(conn, *args)))
+        except Exception as e:
+            outcomes.append((False, e))
+    return outcomes
+
+
+def _settle(jobs, outcomes):
+    for (_, _, fut), (ok, value) in zip(jobs, outcomes):
+        if fut.done():  # caller went away
+            continue
+        if ok:
+            fut.set_result(value)
+        else:
+            fut.set_exception(value)
+
+
+async def _drain_orders(queue):
+    """Coalesce whatever orders are waiting into one COM-thread job per tick."""
+    loop = asyncio.get_running_loop()
+    while True:
+        jobs = [await queue.get()]
+        while len(jobs) < ORDER_BATCH_MAX and not queue.empty():
+            jobs.append(queue.get_nowait())
+        try:
+            conn = get_sterling()
+            outcomes = await loop.run_in_executor(
+                conn.executor, _run_orders, conn, [(send, args) for send, args, _ in jobs])
+        except asyncio.CancelledError:
+            _settle(jobs, [(False, RuntimeError("order queue stopped")) for _ in jobs])
+            raise
+        except Exception as e:
+            outcomes = [(False, e)] * len(jobs)
+        _settle(jobs, outcomes)
+
+
+def _drain_stopped(queue, task):
+    """Done-callback: fail whatever is still queued so no caller waits on a dead drain task."""
+    if not task.cancelled() and task.exception() is not None:
+        LOG.error("❌ Order queue stopped: %r", task.exception())
+    while not queue.empty():
+        _, _, fut = queue.get_nowait()
+        if not fut.done():
+            fut.set_exception(RuntimeError("order queue is not running"))
+
+
+async def _submit_order(send, *args):
+    """Queue one order for the drain task and wait for its own result."""
+    if app.state.order_drain.done():
+        raise RuntimeError("order queue is not running")
+    fut = asyncio.get_running_loop().create_future()
+    app.state.order_queue.put_nowait((send, args, fut))
+    return await fut
+
+
 # ============================================================
 # STARTUP / SHUTDOWN
 # ============================================================
 
 @app.on_event("startup")
-def startup_event():
-    global sterling
+async def startup_event():
+    configure_logging(load_config().get("logging", {}).get("level", "INFO"))
     try:
-        sterling = SterlingConnector()
-        print("✅ SterlingConnector initialized")
-    except Exception as e:
-        print(f"❌ Failed to initialize: {e}")
+        # Warm the singleton off the event loop so a missing DLL still fails startup.
+        await asyncio.to_thread(get_sterling)
+        queue = app.state.order_queue = asyncio.Queue()
+        app.state.order_drain = asyncio.create_task(_drain_orders(queue))
+        app.state.order_drain.add_done_callback(functools.partial(_drain_stopped, queue))
+        LOG.info("✅ SterlingConnector initialized")
+    except Exception:
+        LOG.exception("❌ Failed to initialize")
         raise
 
 
 @app.on_event("shutdown")
 def shutdown_event():
-    global sterling
-    sterling = None
-    print("🛑 SterlingConnector shutdown")
+    drain = getattr(app.state, "order_drain", None)
+    if drain is not None:
+        drain.cancel()
+    if get_sterling.cache_info().currsize:
+        get_sterling().close()
+    get_sterling.cache_clear()
+    LOG.info("🛑 SterlingConnector shutdown")
 
 
 # ============================================================
 # HEALTH
 # ============================================================
 
-@app.get("/")
+@app.get("/", response_model=None)
 def root():
-    return {"status": "ok", "message": "Sterling Connector API running"}
+    return ORJSONResponse({"status": "ok", "message": "Sterling Connector API running"})
 
 
 # ============================================================
 # ORDERS
 # ============================================================
 
-@app.post("/order")
-def place_order(req: UnifiedOrderRequest):
+@app.post("/order", response_model=None, openapi_extra=_request_body(UnifiedOrderRequest))
+async def place_order(req: UnifiedOrderRequest = Depends(_body(UnifiedOrderRequest))):
     try:
-        is_market = (
-            req.ord_type == "M"
-            or req.ord_price is None
-            or req.ord_price == 0.0
-        )
+        kind = _order_kind(req)
 
-        print(f"📥 {req.symbol} {req.ord_side} {req.ord_size} ({'MKT' if is_market else 'LMT'})")
-
-        if is_market:
-            result = sterling.send_market(
-                req.account,
-                req.symbol,
-                int(req.ord_size),
-                int(req.ord_disp or 0),
-                req.ord_route,
-                req.ord_side,
-                req.ord_tif or "D"
-            )
-            
-            print(f"✅ {result}")
-            
-            return {
-                "order_type": "market",
-                "order_id": result,
-                "symbol": req.symbol,
-                "side": req.ord_side,
-                "quantity": req.ord_size
-            }
-        else:
-            result = sterling.send_limit(
-                req.account,
-                req.symbol,
-                int(req.ord_size),
-                int(req.ord_disp or 0),
-                req.ord_route,
-                float(req.ord_price),
-                req.ord_side,
-                req.ord_tif or "D"
-            )
-            
-            print(f"✅ {result}")
-            
-            return {
-                "order_type": "limit",
-                "order_id": result,
-                "symbol": req.symbol,
-                "side": req.ord_side,
-                "quantity": req.ord_size,
-                "price": req.ord_price
-            }
+        LOG.debug("📥 %s %s %d (%s)", req.symbol, req.ord_side, req.ord_size, kind)
+
+        send, build_args = _DISPATCH[kind]
+        result = await _submit_order(send, *build_args(req))
+
+        LOG.debug("✅ %s", result)
+
+        return ORJSONResponse(_order_ack(kind, req, result))
 
     except Exception as e:
-        print(f"❌ ERROR: {e}")
-        import traceback
-        traceback.print_exc()
+        LOG.exception("❌ Order error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/order/stop")
-def place_stop_order(req: StopOrderRequest):
+@app.post("/orders/batch", response_model=None, openapi_extra=_request_body(BatchOrderRequest))
+async def place_order_batch(req: BatchOrderRequest = Depends(_body(BatchOrderRequest))):
     try:
-        if req.limit_price and req.limit_price > 0:
-            result = sterling.send_stoplimit(
-                req.account,
-                req.symbol,
-                int(req.ord_size),
-                int(req.ord_disp or 0),
-                req.ord_route,
-                float(req.stop_price),
-                float(req.limit_price),
-                req.ord_side,
-                req.ord_tif or "D"
-            )
-        else:
-            result = sterling.send_stop(
-                req.account,
-                req.symbol,
-                int(req.ord_size),
-                int(req.ord_disp or 0),
-                req.ord_route,
-                float(req.stop_price),
-                req.ord_side,
-                req.ord_tif or "D"
-            )
-
-        return {"order_id": result}
+        LOG.debug("📥 batch of %d orders", len(req.orders))
+        kinds = [_order_kind(order) for order in req.orders]
+        calls = [(_DISPATCH[kind][0], _DISPATCH[kind][1](order)) for kind, order in zip(kinds, req.orders)]
+        # One job keeps the batch back-to-back on the COM thread; failures are reported per order.
+        outcomes = await _call(_run_orders, get_sterling(), calls)
+        results = []
+        for kind, order, (ok, value) in zip(kinds, req.orders, outcomes):
+            if ok:
+                results.append(_order_ack(kind, order, value))
+            else:
+                LOG.error("❌ Batch order %s %s failed: %s", order.symbol, order.ord_side, value)
+                results.append({"order_type": kind, "symbol": order.symbol, "side": order.ord_side, "error": str(value)})
+        return ORJSONResponse({"orders": results})
+    except Exception as e:
+        LOG.exception("❌ Batch order error: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/order/stop", response_model=None, openapi_extra=_request_body(StopOrderRequest))
+async def place_stop_order(req: StopOrderRequest = Depends(_body(StopOrderRequest))):
+    try:
+        kind = "stop_limit" if req.limit_price and req.limit_price > 0 else "stop"
+        send, build_args = _DISPATCH[kind]
+        result = await _submit_order(send, *build_args(req))
+
+        return ORJSONResponse({"order_id": result})
 
     except Exception as e:
-        print(f"❌ Stop order error: {e}")
+        LOG.error("❌ Stop order error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.delete("/order")
-def cancel_order(req: CancelRequest):
+@app.delete("/order", response_model=None, openapi_extra=_request_body(CancelRequest))
+async def cancel_order(req: CancelRequest = Depends(_body(CancelRequest))):
     try:
-        sterling.cancel_order(req.account, req.order_id)
-        return {"status": "cancel_requested", "order_id": req.order_id}
+        await _call(get_sterling().cancel_order, req.account, req.order_id)
+        return ORJSONResponse({"status": "cancel_requested", "order_id": req.order_id})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/order/replace")
-def replace_order(req: ReplaceRequest):
+@app.post("/order/replace", response_model=None, openapi_extra=_request_body(ReplaceRequest))
+async def replace_order(req: ReplaceRequest = Depends(_body(ReplaceRequest))):
     try:
-        new_id = sterling.replace_order(
+        new_id = await _call(
+            get_sterling().replace_order,
             req.order_id,
             req.new_qty,
-            float(req.new_price)
+            req.new_price
         )
-        return {"new_order_id": new_id}
+        return ORJSONResponse({"new_order_id": new_id})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -203,38 +371,38 @@ def replace_order(req: ReplaceRequest):
 # POSITIONS / ORDERS INFO
 # ============================================================
 
-@app.get("/positions/{account}/{symbol}")
-def get_position(account: str, symbol: str):
+@app.get("/positions/{account}/{symbol}", response_model=None)
+async def get_position(account: str, symbol: str):
     try:
-        pos = sterling.position(account, symbol)
-        return {"account": account, "symbol": symbol, "position": pos}
+        pos = await _call(get_sterling().position, account, symbol)
+        return ORJSONResponse({"account": account, "symbol": symbol, "position": pos})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/positions/{account}")
-def get_all_positions(account: str):
+@app.get("/positions/{account}", response_model=None)
+async def get_all_positions(account: str):
     try:
-        raw = sterling.all_positions(account)
-        return {"account": account, "positions_raw": raw}
+        raw = await _call(get_sterling().all_positions, account)
+        return ORJSONResponse({"account": account, "positions_raw": raw})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/orders")
-def get_orders():
+@app.get("/orders", response_model=None)
+async def get_orders():
     try:
-        cnt = sterling.get_orders()
-        return {"open_orders_count": cnt}
+        cnt = await _call(get_sterling().get_orders)
+        return ORJSONResponse({"open_orders_count": cnt})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/order/status/{order_id}")
-def order_status(order_id: str):
+@app.get("/order/status/{order_id}", response_model=None)
+async def order_status(order_id: str):
     try:
-        status = sterling.order_status(order_id)
-        return {"order_id": order_id, "status": status}
+        status = await _call(get_sterling().order_status, order_id)
+        return ORJSONResponse({"order_id": order_id, "status": status})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -245,4 +413,22 @@ def order_status(order_id: str):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=6000)
+
+    try:
+        import uvloop
+        uvloop.install()
+        loop = "uvloop"
+    except ImportError:  # uvloop has no Windows build
+        loop = "asyncio"
+
+    # Reload needs an import string; otherwise serve this module's app rather than re-importing it.
+    reload = os.getenv("DEV") == "1"
+    uvicorn.run(
+        "connector.app:app" if reload else app,
+        host="0.0.0.0",
+        port=6000,
+        loop=loop,
+        http="httptools",
+        ws="websockets",
+        reload=reload,
+    )
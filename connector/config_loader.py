@@ -1,22 +1,36 @@
 ﻿from pathlib import Path
+import threading
 import yaml
 
+# libyaml's C loader when PyYAML was built with it, else the pure-Python one.
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 _cfg_cache = None
+_CFG_LOCK = threading.Lock()
 
 def load_config():
     global _cfg_cache
     if _cfg_cache is not None:
         return _cfg_cache
 
-    root = Path(__file__).resolve().parents[1]
-    for fname in ("config.yaml", "config.yml"):
-        cfg_path = root / "config" / fname
-        if cfg_path.exists():
-            with open(cfg_path, "r", encoding="utf-8") as f:
-                _cfg_cache = yaml.safe_load(f)
-                return _cfg_cache
+    with _CFG_LOCK:
+        if _cfg_cache is not None:
+            return _cfg_cache
+        root = Path(__file__).resolve().parents[1]
+        for fname in ("config.yaml", "config.yml"):
+            cfg_path = root / "config" / fname
+            if cfg_path.exists():
+                with open(cfg_path, "r", encoding="utf-8") as f:
+                    _cfg_cache = yaml.load(f, Loader=_Loader)
+                    return _cfg_cache
     raise FileNotFoundError("No config.yaml or config.yml found")
 
 def get_secret(key: str, default=None):
     cfg = load_config()
     return cfg.get("secrets", {}).get(key, default)
+
+# Parse once per process at import so request paths only ever hit the cache.
+try:
+    load_config()
+except FileNotFoundError:
+    pass
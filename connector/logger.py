@@ -1,7 +1,24 @@
-import logging, structlog, sys
+import logging, logging.handlers, queue, atexit, sys
+
+# One queue and listener thread per process, however often configure_logging runs
+# (every app startup, including lifespan restarts under TestClient).
+_log_queue = queue.SimpleQueue()
+_listener = None
+
+def _start_listener():
+    global _listener
+    if _listener is None:
+        _listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler(sys.stdout))
+        _listener.start()
+        atexit.register(_listener.stop)
 
 def configure_logging(level="INFO"):
-    logging.basicConfig(stream=sys.stdout, level=getattr(logging, level), format="%(message)s")
+    import structlog  # deferred: only needed once logging is actually configured
+    # Handlers write from a listener thread so request paths only enqueue records.
+    _start_listener()
+    # basicConfig only installs the QueueHandler once; later calls just apply the level.
+    logging.basicConfig(format="%(message)s", handlers=[logging.handlers.QueueHandler(_log_queue)])
+    logging.getLogger().setLevel(getattr(logging, level))
     structlog.configure(
         processors=[structlog.processors.TimeStamper(fmt="iso"),
                     structlog.processors.add_log_level,
@@ -1,16 +1,40 @@
-from fastapi import FastAPI
+import orjson
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
 
 def create_app(session_mgr, sterling):
-    app = FastAPI()
+    app = FastAPI(default_response_class=ORJSONResponse)
+
+    # Encoded health body, rebuilt only when the session or account list changes.
+    health_cache = {"key": None, "body": None}
 
     @app.get("/api/health")
-    def health():
-        return {"status":"ok","sessionId":session_mgr.session_id,"accounts":session_mgr.accounts}
+    async def health():
+        key = (session_mgr.session_id, tuple(session_mgr.accounts))
+        if key != health_cache["key"]:
+            health_cache["body"] = orjson.dumps({"status":"ok","sessionId":key[0],"accounts":list(key[1])})
+            health_cache["key"] = key
+        return Response(content=health_cache["body"], media_type="application/json")
 
     @app.post("/api/place-order")
-    async def place(payload: dict):
+    async def place(request: Request):
+        # Parse the body with orjson directly instead of FastAPI's dict validation.
+        try:
+            payload = orjson.loads(await request.body())
+        except orjson.JSONDecodeError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        if not isinstance(payload, dict):
+            raise HTTPException(status_code=422, detail="order payload must be a JSON object")
+        # Replays are answered from the session state on the loop, without a connector round-trip.
+        key = payload.get("idempotencyKey")
+        if key is not None and not isinstance(key, str):
+            raise HTTPException(status_code=422, detail="idempotencyKey must be a string")
+        if key:
+            prev = session_mgr.is_idempotent(key)
+            if prev:
+                return ORJSONResponse({"status":"submitted","details":"idempotent","orderId":prev})
         if payload.get("type")=="market":
-            return await sterling.send_market(payload)
-        return await sterling.send_limit(payload)
+            return ORJSONResponse(await sterling.send_market(payload))
+        return ORJSONResponse(await sterling.send_limit(payload))
 
     return app
\ No newline at end of file
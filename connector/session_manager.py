@@ -1,23 +1,90 @@
-import sqlite3, time
+import atexit, os, sqlite3, time, threading, weakref
 from pathlib import Path
 import logging
 
 LOG = logging.getLogger("session_manager")
-STATE_DIR = Path("./state")
-STATE_DIR.mkdir(exist_ok=True)
+STATE_DIR = Path(os.environ.get("STERLING_STATE_DIR") or "./state")
 DB_PATH = STATE_DIR / "connector_state.sqlite"
 
+# The key b-tree holds the row itself: no separate rowid tree plus PK index.
+IDEMPOTENCY_DDL = ("CREATE TABLE IF NOT EXISTS idempotency "
+                   "(key TEXT PRIMARY KEY, result TEXT, created_at INTEGER) WITHOUT ROWID")
+# Fixed SQL text so sqlite3's per-connection statement cache reuses the prepared statements.
+SELECT_IDEMPOTENCY = "SELECT result FROM idempotency WHERE key=?"
+INSERT_IDEMPOTENCY = "INSERT OR REPLACE INTO idempotency VALUES (?,?,?)"
+MMAP_SIZE = 256 * 1024 * 1024
+FLUSH_INTERVAL = 0.05  # seconds between background commits
+FLUSH_BATCH = 64       # pending rows that trigger an early commit
+IDEM_CACHE_SIZE = 10_000
+CHECKPOINT_INTERVAL = 60  # seconds between WAL truncations
+
+_state_dir_ready = False  # STATE_DIR is created on first SessionManager, not at import
+
+class _Reader:
+    """A thread's read-only connection, closed once the thread exits and drops it."""
+    __slots__ = ("conn", "close", "__weakref__")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.close = weakref.finalize(self, conn.close)
+
 class SessionManager:
+    __slots__ = ("session_id", "accounts", "outbound_callback", "_conn",
+                 "_pending", "_flushing", "_write_lock", "_flush_wake", "_closed", "_flusher",
+                 "_readers", "_reader_conns", "_idem_cache", "_cache_lock")
+
     def __init__(self):
         self.session_id = None
         self.accounts = []
-        self._conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        global _state_dir_ready
+        if not _state_dir_ready:
+            STATE_DIR.mkdir(parents=True, exist_ok=True)
+            _state_dir_ready = True
+        self._conn = sqlite3.connect(DB_PATH, timeout=5.0, check_same_thread=False)
         self._init_db()
         self.outbound_callback = None
+        # Idempotency rows accepted but not yet committed, and the batch being committed.
+        self._pending = {}
+        self._flushing = {}
+        self._write_lock = threading.Lock()
+        self._flush_wake = threading.Event()
+        self._closed = False
+        # One read-only connection per thread so lookups never queue behind commits.
+        self._readers = threading.local()
+        self._reader_conns = weakref.WeakSet()  # live _Readers, closed by close()
+        # Recently seen keys; insertion-ordered so the oldest entry is evicted first.
+        self._idem_cache = {}
+        self._cache_lock = threading.Lock()
+        self._flusher = threading.Thread(target=self._flush_loop, name="idempotency-flush", daemon=True)
+        self._flusher.start()
+        # The flusher is a daemon thread; make sure accepted keys reach disk on exit.
+        atexit.register(self.close)
 
     def _init_db(self):
         cur = self._conn.cursor()
-        cur.execute("CREATE TABLE IF NOT EXISTS idempotency (key TEXT PRIMARY KEY, result TEXT, created_at INTEGER)")
+        mode = cur.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        if mode.lower() != "wal":
+            LOG.warning("SQLite refused WAL mode (journal_mode=%s); writes will block readers", mode)
+        cur.executescript(
+            "PRAGMA synchronous=NORMAL;"
+            "PRAGMA busy_timeout=5000;"
+            "PRAGMA temp_store=MEMORY;"
+            "PRAGMA cache_size=-20000;"
+            "PRAGMA foreign_keys=ON;"
+            f"PRAGMA mmap_size={MMAP_SIZE};"
+        )
+        row = cur.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='idempotency'").fetchone()
+        if row and "WITHOUT ROWID" not in row[0].upper():
+            LOG.info("Migrating idempotency table to WITHOUT ROWID")
+            cur.executescript(
+                "BEGIN;"
+                "ALTER TABLE idempotency RENAME TO idempotency_rowid;"
+                f"{IDEMPOTENCY_DDL};"
+                "INSERT INTO idempotency SELECT key, result, created_at FROM idempotency_rowid;"
+                "DROP TABLE idempotency_rowid;"
+                "COMMIT;"
+            )
+        cur.execute(IDEMPOTENCY_DDL)
         self._conn.commit()
 
     def set_session(self, session_id, accounts):
@@ -25,20 +92,109 @@ class SessionManager:
         self.accounts = accounts
 
     def is_idempotent(self, key):
-        cur = self._conn.cursor()
-        cur.execute("SELECT result FROM idempotency WHERE key=?", (key,))
-        r = cur.fetchone()
-        return r[0] if r else None
+        cached = self._idem_cache.get(key)
+        if cached is not None:
+            return cached
+        # Check pending before flushing: flush() moves rows in that order.
+        hit = self._pending.get(key) or self._flushing.get(key)
+        if hit:
+            return hit[0]
+        r = self._get_reader().execute(SELECT_IDEMPOTENCY, (key,)).fetchone()
+        if r is None:
+            return None
+        self._cache_put(key, r[0])
+        return r[0]
+
+    def _cache_put(self, key, result):
+        # dict get/set are atomic under the GIL; only eviction needs the lock.
+        self._idem_cache[key] = result
+        if len(self._idem_cache) > IDEM_CACHE_SIZE:
+            with self._cache_lock:
+                while len(self._idem_cache) > IDEM_CACHE_SIZE:
+                    try:
+                        del self._idem_cache[next(iter(self._idem_cache))]
+                    except (KeyError, RuntimeError):
+                        break
+
+    def _get_reader(self):
+        reader = getattr(self._readers, "reader", None)
+        if reader is None:
+            conn = sqlite3.connect(f"{DB_PATH.resolve().as_uri()}?mode=ro", uri=True,
+                                   timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA query_only=1")
+            conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+            reader = self._readers.reader = _Reader(conn)
+            self._reader_conns.add(reader)
+        return reader.conn
 
     def store_idempotent(self, key, result):
-        cur = self._conn.cursor()
-        cur.execute("INSERT OR REPLACE INTO idempotency VALUES (?,?,?)", (key, result, int(time.time())))
-        self._conn.commit()
+        """Record ``key`` now; the row is committed by the background flusher."""
+        self._pending[key] = (result, int(time.time()))
+        self._cache_put(key, result)
+        if len(self._pending) >= FLUSH_BATCH:
+            self._flush_wake.set()
+
+    def store_idempotent_sync(self, key, result):
+        """Record ``key`` and commit before returning."""
+        self.store_idempotent(key, result)
+        self.flush()
+
+    def flush(self):
+        with self._write_lock:
+            if not self._pending:
+                return
+            self._flushing, self._pending = self._pending, {}
+            rows = [(k, r, ts) for k, (r, ts) in self._flushing.items()]
+            try:
+                with self._conn:
+                    self._conn.executemany(INSERT_IDEMPOTENCY, rows)
+            except Exception:
+                # Requeue the batch for the next flush, in place so concurrent stores are not
+                # dropped; a key stored again since the swap keeps its newer result.
+                for key, row in self._flushing.items():
+                    self._pending.setdefault(key, row)
+                raise
+            finally:
+                self._flushing = {}
+
+    def checkpoint(self):
+        with self._write_lock:
+            busy, log_frames, checkpointed = self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        if busy:
+            LOG.warning("WAL checkpoint blocked by readers (log=%s, checkpointed=%s)", log_frames, checkpointed)
+        else:
+            LOG.debug("WAL checkpoint done (log=%s, checkpointed=%s)", log_frames, checkpointed)
+
+    def _flush_loop(self):
+        # The flusher is the only writer, so it also keeps the WAL from growing unbounded.
+        next_checkpoint = time.monotonic() + CHECKPOINT_INTERVAL
+        while not self._closed:
+            self._flush_wake.wait(FLUSH_INTERVAL)
+            self._flush_wake.clear()
+            try:
+                self.flush()
+                if time.monotonic() >= next_checkpoint:
+                    next_checkpoint = time.monotonic() + CHECKPOINT_INTERVAL
+                    self.checkpoint()
+            except Exception:
+                LOG.exception("Idempotency flush failed")
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._flush_wake.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+        for reader in list(self._reader_conns):
+            reader.close()
+        self._conn.close()
 
     def register_outbound_callback(self, cb):
         self.outbound_callback = cb
 
     def handle_inbound_event(self, msg):
-        LOG.info("Inbound event: %s", msg)
+        if LOG.isEnabledFor(logging.DEBUG):
+            LOG.debug("Inbound event: %s", msg)
         if self.outbound_callback:
             self.outbound_callback(msg)
\ No newline at end of file
@@ -1,7 +1,16 @@
 ﻿import os
-import clr
 import time
-from System import Activator, Reflection
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _enter_sta():
+    """Executor initializer: mark the COM thread single-threaded-apartment before first use."""
+    from System.Threading import ApartmentState, Thread
+    thread = Thread.CurrentThread
+    if not thread.TrySetApartmentState(ApartmentState.STA):
+        print(f"⚠️ Sterling COM thread could not enter STA (apartment={thread.GetApartmentState()}); "
+              "the wrapper will be created in that apartment instead")
+
 
 class SterlingConnector:
     def __init__(self):
@@ -13,6 +22,11 @@ class SterlingConnector:
         if not os.path.exists(self.dll_path):
             raise FileNotFoundError(f"SterlingWrapper.dll not found at {self.dll_path}")
 
+        # pythonnet is imported here rather than at module import so that importing
+        # the connector (e.g. for app.py's dispatch table) does not start the CLR.
+        import clr
+        from System import Reflection
+
         # Load the assembly once at the start
         self.asm = Reflection.Assembly.LoadFile(self.dll_path)
         self.ConnectorType = self.asm.GetType("SterlingWrapper.Connector")
@@ -20,12 +34,20 @@ class SterlingConnector:
             raise RuntimeError("SterlingWrapper.Connector type not found in DLL")
 
         self._conn = None
+        self._methods = {}  # bound wrapper methods, valid for the current _conn
+        # Every wrapper call runs on this one thread, which also creates _conn on first use.
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sterling-com",
+                                           initializer=_enter_sta)
         print("✅ Sterling Connector Module Loaded")
 
+    def close(self):
+        self.executor.shutdown(wait=True)
+
     def _get_conn(self):
         """Internal helper to ensure the COM object is instantiated."""
         if self._conn is None:
             print("🔗 Connecting to Sterling Trader Pro API...")
+            from System import Activator
             try:
                 self._conn = Activator.CreateInstance(self.ConnectorType)
             except Exception as e:
@@ -33,27 +55,31 @@ class SterlingConnector:
                 raise
         return self._conn
 
+    def _get_method(self, func_name):
+        """Bound wrapper method, resolved through pythonnet once per connection."""
+        method = self._methods.get(func_name)
+        if method is None:
+            method = self._methods[func_name] = getattr(self._get_conn(), func_name)
+        return method
+
     def _execute_with_retry(self, func_name, *args):
         """
         Executes a method. If it fails with an RPC error (0x800706BA), 
         it resets the connection and retries once.
         """
         try:
-            conn = self._get_conn()
-            method = getattr(conn, func_name)
-            return method(*args)
+            return self._get_method(func_name)(*args)
         except Exception as e:
             error_msg = str(e)
             # 0x800706BA is the code for 'The RPC server is unavailable'
             if "800706BA" in error_msg or "RPC" in error_msg:
                 print(f"⚠️ RPC Error detected in {func_name}. Sterling may have closed. Retrying...")
                 self._conn = None  # Force re-instantiation
+                self._methods.clear()
                 time.sleep(1)      # Short pause for Sterling to stabilize
                 
                 # Retry once
-                conn = self._get_conn()
-                method = getattr(conn, func_name)
-                return method(*args)
+                return self._get_method(func_name)(*args)
             else:
                 # If it's a different error, raise it normally
                 print(f"❌ Execution Error in {func_name}: {error_msg}")
@@ -0,0 +1,8 @@
+import functools
+from connector.sterling_connector import SterlingConnector
+
+
+@functools.lru_cache(maxsize=1)
+def get_sterling() -> SterlingConnector:
+    """Process-wide SterlingConnector, created on first use."""
+    return SterlingConnector()
@@ -1,11 +1,12 @@
 ﻿import asyncio
 import logging
-import websockets
 import ssl
-import certifi
 
 LOG = logging.getLogger("ws_client")
 
+# Reconnect delays in seconds, indexed by consecutive failures; the last entry repeats.
+_BACKOFFS = (1.0, 1.5, 2.25, 3.4, 5.1, 7.6, 11.4, 17.1, 25.7, 38.5, 60.0)
+
 class WSClient:
     def __init__(self, url: str, token: str, session_manager, verify: bool = True, cafile: str | None = None):
         self.url = url
@@ -13,6 +14,9 @@ class WSClient:
         self.session_manager = session_manager
         self.verify = verify
         self.cafile = cafile
+        self._n = 0  # consecutive failed connects
+        # Built once: reconnects must not re-read and re-parse the CA bundle.
+        self._ssl_ctx = self._make_ssl_context()
 
     def _make_ssl_context(self):
         """Build SSL context based on settings."""
@@ -26,6 +30,7 @@ class WSClient:
             return ctx
         if self.cafile:
             return ssl.create_default_context(cafile=self.cafile)
+        import certifi
         return ssl.create_default_context(cafile=certifi.where())
 
     async def connect_loop(self):
@@ -34,16 +39,30 @@ class WSClient:
             try:
                 await self._run()
             except Exception as e:
-                LOG.error("WS error: %s", e, exc_info=True)
-                await asyncio.sleep(5)
+                # Tracebacks only at DEBUG: a flapping server would otherwise format one per retry.
+                if LOG.isEnabledFor(logging.DEBUG):
+                    LOG.debug("WS error", exc_info=True)
+                else:
+                    LOG.error("WS error: %s", e)
+                await asyncio.sleep(self._next_backoff())
+
+    def _next_backoff(self):
+        b = _BACKOFFS[min(self._n, len(_BACKOFFS) - 1)]
+        self._n += 1
+        return b + (self._n & 0x3) * 0.1  # small spread without calling random
 
     async def _run(self):
+        import websockets  # deferred so REST-only processes never load it
         headers = {"Authorization": f"Bearer {self.token}"}
-        ssl_ctx = self._make_ssl_context()
 
         LOG.info("Connecting WS → %s", self.url)
-        async with websockets.connect(self.url, extra_headers=headers, ssl=ssl_ctx) as ws:
+        # Frames are small JSON messages: permessage-deflate costs more CPU than it saves,
+        # and 64 KiB read/write bounds keep per-frame buffers from growing.
+        async with websockets.connect(self.url, extra_headers=headers, ssl=self._ssl_ctx, compression=None,
+                                      max_size=2**16, write_limit=2**16,
+                                      ping_interval=20, ping_timeout=10) as ws:
             LOG.info("Connected to WS server")
+            self._n = 0
             async for msg in ws:
                 try:
                     self.session_manager.handle_inbound_event(msg)
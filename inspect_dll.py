@@ -1,10 +1,15 @@
-﻿import clr
+﻿import clr, sys
 from pathlib import Path
-from System.Reflection import Assembly
+from clr_reflection import exported_types, reflection_only_load
 
 DLL_PATH = Path(__file__).resolve().parent / "SterlingWrapper" / "SterlingWrapper.dll"
+
 print(f"Loading {DLL_PATH}")
-asm = Assembly.LoadFile(str(DLL_PATH))
+# Metadata only: nothing is instantiated, so skip the full load and its initializers.
+asm = reflection_only_load(str(DLL_PATH))
+
+# Public types only; a partially loadable assembly still lists the types that did load.
+types = exported_types(asm)
 
-for t in asm.GetTypes():
-    print(t.FullName)
+# One write for the whole listing rather than a console write per type.
+sys.stdout.write("".join(f"{t.FullName}\n" for t in types))
@@ -2,6 +2,10 @@
 import clr, sys, os
 import System
 from System import Reflection
+from clr_reflection import exported_types, reflection_only_load
+
+# Same set as GetMethods(), but public-only is filtered by the CLR instead of per method in Python.
+METHOD_FLAGS = Reflection.BindingFlags.Public | Reflection.BindingFlags.Instance | Reflection.BindingFlags.Static
 
 paths = [
     r"C:\Program Files\Sti\Excel RTD Add-in\Interop.SterlingLib.dll",
@@ -11,24 +15,35 @@ paths = [
 
 found = []
 for p in paths:
-    if os.path.exists(p):
-        try:
-            asm = Reflection.Assembly.LoadFile(p)
-            print(f"\nLoaded assembly: {p}")
-            types = asm.GetTypes()
-            for t in types:
-                print(f"TYPE: {t.FullName}")
-                # list public methods (non-special)
-                methods = [m for m in t.GetMethods() if not m.IsSpecialName and m.IsPublic]
-                if methods:
-                    for m in methods:
-                        sig = f"{m.ReturnType.Name} {m.Name}({', '.join([param.ParameterType.Name + ' ' + param.Name for param in m.GetParameters()])})"
-                        print(f"  - {sig}")
-            found.append(p)
-        except Exception as e:
-            print(f"Failed to load {p}: {e}")
-    else:
+    # The loader does the existence check itself, so there is no separate stat per path.
+    try:
+        # Metadata only: the types are listed, never instantiated.
+        asm = reflection_only_load(p)
+    except (System.IO.FileNotFoundException, System.IO.DirectoryNotFoundException):
         print(f"Not found: {p}")
+        continue
+    except Exception as e:
+        print(f"Failed to load {p}: {e}")
+        continue
+    # Output for each assembly is buffered and written once.
+    lines = [f"\nLoaded assembly: {asm.Location}"]
+    if os.path.normcase(asm.Location) != os.path.normcase(p):
+        # Same identity as an earlier load (e.g. the installed and local SterlingWrapper.dll).
+        lines.append(f"(requested {p}; that assembly identity was already loaded)")
+    try:
+        for t in exported_types(asm):
+            lines.append(f"TYPE: {t.FullName}")
+            # list public methods (non-special)
+            methods = [m for m in t.GetMethods(METHOD_FLAGS) if not m.IsSpecialName]
+            if methods:
+                for m in methods:
+                    params = ", ".join(f"{param.ParameterType.Name} {param.Name}" for param in m.GetParameters())
+                    lines.append(f"  - {m.ReturnType.Name} {m.Name}({params})")
+        sys.stdout.write("\n".join(lines) + "\n")
+        found.append(p)
+    except Exception as e:
+        sys.stdout.write("\n".join(lines) + "\n")
+        print(f"Failed to load {p}: {e}")
 
 if not found:
     print("\nNo assemblies found at those paths — update paths variable to point to your DLLs.")
@@ -1,6 +1,14 @@
 ﻿import pythoncom, win32com.client, sys
 from win32com.client import gencache
 
+_tlb_cache = {}  # path -> loaded ITypeLib
+
+def _load(tlb_path):
+    tl = _tlb_cache.get(tlb_path)
+    if tl is None:
+        tl = _tlb_cache[tlb_path] = pythoncom.LoadTypeLib(tlb_path)
+    return tl
+
 def list_typelibs():
     # enumerate registered type libs
     tlbs = pythoncom.GetTypeLibCollection()
@@ -19,7 +27,7 @@ def list_typelibs():
             pass
 
 def load_and_list(tlb_path):
-    tl = pythoncom.LoadTypeLib(tlb_path)
+    tl = _load(tlb_path)
     for i in range(tl.GetTypeInfoCount()):
         ti = tl.GetTypeInfo(i)
         doc = ti.GetDocumentation(-1)
@@ -1,7 +1,7 @@
 ﻿import clr
 from pathlib import Path
 
-DLL_PATH = Path(__file__).resolve() / "SterlingWrapper" / "SterlingWrapper.dll"
+DLL_PATH = Path(__file__).resolve().parent / "SterlingWrapper" / "SterlingWrapper.dll"
 clr.AddReference(str(DLL_PATH))
 
 import SterlingWrapper
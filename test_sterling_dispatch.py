@@ -12,14 +12,29 @@ candidates = [
     "Interop.SterlingLib.STIOrder",  # try possible .NET interop names
 ]
 
+failures = []
 for p in candidates:
+    print("Trying:", p)
+    # Registry-only lookup: unregistered ProgIDs never reach CoCreateInstance.
     try:
-        print("Trying:", p)
-        obj = win32com.client.Dispatch(p)
+        clsid = pythoncom.ProgIDToCLSID(p)
+    except pythoncom.com_error:
+        print("NOT REGISTERED:", p)
+        continue
+    try:
+        try:
+            # Early-bound makepy wrapper (cached under gen_py) when the object has a typelib.
+            obj = win32com.client.gencache.EnsureDispatch(clsid)
+        except TypeError:  # no type info: late-bound IDispatch only
+            obj = win32com.client.Dispatch(clsid, p)
         print("DISPATCH OK:", p, "->", obj)
     except Exception as e:
         print("DISPATCH FAIL:", p, ":", repr(e))
-        traceback.print_exc()
-        print("-" * 60)
+        failures.append((p, e))
+
+for p, e in failures:
+    print("-" * 60)
+    print("Traceback for", p)
+    traceback.print_exception(type(e), e, e.__traceback__)
 sys.stdout.flush()
 pythoncom.CoUninitialize()
@@ -2,6 +2,7 @@
 import clr, os
 from System import Activator
 from System import Reflection
+from clr_reflection import exported_types, loadable_types
 
 dll_path = r"C:\Users\Administrator\Desktop\connector-sterling\SterlingWrapper\SterlingWrapper.dll"
 if not os.path.exists(dll_path):
@@ -11,8 +12,8 @@ if not os.path.exists(dll_path):
 asm = Reflection.Assembly.LoadFile(dll_path)
 print("Loaded assembly:", asm.FullName)
 
-# List types in DLL
-types = asm.GetTypes()
+# List public types in DLL
+types = exported_types(asm)
 print("Types in assembly:")
 for t in types:
     print(" -", t.FullName)
@@ -22,7 +23,8 @@ type_name = "SterlingWrapper.Connector"
 ConnectorType = asm.GetType(type_name)
 if ConnectorType is None:
     print("Could not find type:", type_name)
-    candidates = [t for t in types if "Connector" in t.FullName]
+    # Search every loadable type: a non-public Connector would explain the failed lookup.
+    candidates = [t for t in loadable_types(asm) if "Connector" in t.FullName]
     print("Connector-like candidates:", [c.FullName for c in candidates])
     raise SystemExit("Connector type not found.")
 
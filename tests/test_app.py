@@ -0,0 +1,239 @@
+import asyncio
+import functools
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import msgspec
+from fastapi.testclient import TestClient
+
+from connector import app as app_module
+
+
+class _FakeSterling:
+    """Stands in for SterlingConnector: the _DISPATCH methods end in _execute_with_retry."""
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def _execute_with_retry(self, func_name, *args):
+        if "BAD" in args:
+            raise RuntimeError(f"{func_name} rejected")
+        return f"{func_name}:{args[1]}"
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+ORDER = {"account": "A", "symbol": "AAPL", "ord_size": 1, "ord_route": "EDGX",
+         "ord_price": 255, "ord_side": "B"}
+
+
+class AppTestCase(unittest.TestCase):
+    def setUp(self):
+        self.sterling = _FakeSterling()
+        for name, value in (("get_sterling", functools.lru_cache(maxsize=1)(lambda: self.sterling)),
+                            ("configure_logging", lambda level: None)):
+            patcher = mock.patch.object(app_module, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = TestClient(app_module.app)
+        self.client.__enter__()
+        self.addCleanup(self.client.__exit__, None, None, None)
+
+
+class OpenAPITest(AppTestCase):
+    def test_request_bodies_are_documented(self):
+        paths = self.client.get("/openapi.json").json()["paths"]
+        expected = {("/order", "post"): "UnifiedOrderRequest",
+                    ("/orders/batch", "post"): "BatchOrderRequest",
+                    ("/order/stop", "post"): "StopOrderRequest",
+                    ("/order", "delete"): "CancelRequest",
+                    ("/order/replace", "post"): "ReplaceRequest"}
+        for (path, method), title in expected.items():
+            body = paths[path][method]["requestBody"]
+            self.assertTrue(body["required"])
+            schema = body["content"]["application/json"]["schema"]
+            self.assertEqual(schema["title"], title)
+            self.assertNotIn("$ref", str(schema))
+
+        order = paths["/order"]["post"]["requestBody"]["content"]["application/json"]["schema"]
+        self.assertEqual(set(order["required"]),
+                         {"account", "symbol", "ord_size", "ord_route", "ord_side"})
+        batch = paths["/orders/batch"]["post"]["requestBody"]["content"]["application/json"]["schema"]
+        self.assertEqual(batch["properties"]["orders"]["maxItems"], app_module.ORDER_BATCH_MAX)
+        self.assertEqual(batch["properties"]["orders"]["items"]["title"], "UnifiedOrderRequest")
+
+
+class ErrorDetailTest(unittest.TestCase):
+    """Pins _error_detail against msgspec's message wording (msgspec==0.18.4)."""
+
+    def _detail(self, model, raw):
+        with self.assertRaises(msgspec.DecodeError) as ctx:
+            msgspec.json.decode(raw, type=model, strict=False)
+        return app_module._error_detail(ctx.exception)
+
+    def test_missing_field(self):
+        self.assertEqual(self._detail(app_module.UnifiedOrderRequest, b'{"account": "A"}'), [
+            {"loc": ["body", "symbol"], "msg": "Object missing required field `symbol`",
+             "type": "value_error.missing"}])
+
+    def test_missing_nested_field(self):
+        self.assertEqual(self._detail(app_module.BatchOrderRequest, b'{"orders": [{"account": "A"}]}'), [
+            {"loc": ["body", "orders", 0, "symbol"], "msg": "Object missing required field `symbol`",
+             "type": "value_error.missing"}])
+
+    def test_wrong_type(self):
+        raw = msgspec.json.encode(dict(ORDER, ord_size="x"))
+        self.assertEqual(self._detail(app_module.UnifiedOrderRequest, raw), [
+            {"loc": ["body", "ord_size"], "msg": "Expected `int`, got `str`", "type": "type_error"}])
+
+    def test_malformed_json(self):
+        detail, = self._detail(app_module.UnifiedOrderRequest, b"{bad")
+        self.assertEqual(detail["loc"], ["body"])
+        self.assertEqual(detail["type"], "value_error.jsondecode")
+        self.assertTrue(detail["msg"].startswith("JSON is malformed"))
+
+
+class ValidationResponseTest(AppTestCase):
+    def test_route_returns_list_detail(self):
+        r = self.client.post("/order", json={"account": "A"})
+        self.assertEqual(r.status_code, 422)
+        self.assertEqual(r.json()["detail"][0]["loc"], ["body", "symbol"])
+
+    def test_lax_coercion(self):
+        r = self.client.post("/order", json=dict(ORDER, ord_size="1", ord_price="255.5"))
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual((r.json()["quantity"], r.json()["price"]), (1, 255.5))
+
+
+class OrderQueueTest(AppTestCase):
+    def test_concurrent_orders_coalesce_and_map_back(self):
+        job_sizes = []
+        run_orders = app_module._run_orders
+
+        def recording_run_orders(conn, orders):
+            job_sizes.append(len(orders))
+            return run_orders(conn, orders)
+
+        patcher = mock.patch.object(app_module, "_run_orders", recording_run_orders)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        queue = app_module.app.state.order_queue
+        queued = []
+        put_nowait = queue.put_nowait
+        queue.put_nowait = lambda job: (queued.append(job), put_nowait(job))
+
+        # Hold the COM thread so the first job blocks and every later order piles up in the queue.
+        release = threading.Event()
+        self.addCleanup(release.set)
+        self.sterling.executor.submit(release.wait)
+        symbols = ["BAD" if i % 5 == 0 else f"S{i}" for i in range(40)]
+        with ThreadPoolExecutor(max_workers=len(symbols)) as pool:
+            responses = [pool.submit(self.client.post, "/order", json=dict(ORDER, symbol=symbol))
+                         for symbol in symbols]
+            deadline = time.monotonic() + 5
+            while len(queued) < len(symbols) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            release.set()
+            responses = [r.result() for r in responses]
+
+        # The first job takes whatever arrived before it blocked; the backlog then drains in full jobs.
+        backlog = len(symbols) - job_sizes[0]
+        full, rest = divmod(backlog, app_module.ORDER_BATCH_MAX)
+        self.assertEqual(job_sizes[1:], [app_module.ORDER_BATCH_MAX] * full + ([rest] if rest else []))
+        for symbol, r in zip(symbols, responses):
+            if symbol == "BAD":
+                self.assertEqual((r.status_code, r.json()), (500, {"detail": "Sendlimit rejected"}))
+            else:
+                self.assertEqual(r.status_code, 200)
+                self.assertEqual(r.json()["order_id"], f"Sendlimit:{symbol}")
+
+    def test_failing_order_does_not_fail_its_job(self):
+        send = app_module.SterlingConnector.send_market
+        args = lambda symbol: ("A", symbol, 1, 0, "EDGX", "B", "D")
+        outcomes = app_module._run_orders(self.sterling, [(send, args("S1")), (send, args("BAD")), (send, args("S2"))])
+        self.assertEqual([ok for ok, _ in outcomes], [True, False, True])
+        self.assertEqual([outcomes[0][1], outcomes[2][1]], ["Sendmarket:S1", "Sendmarket:S2"])
+        self.assertIsInstance(outcomes[1][1], RuntimeError)
+
+
+class BatchOrderTest(AppTestCase):
+    def test_failed_orders_are_reported_per_order(self):
+        market = {k: v for k, v in ORDER.items() if k != "ord_price"}
+        r = self.client.post("/orders/batch", json={"orders": [ORDER, dict(ORDER, symbol="BAD"), market]})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json(), {"orders": [
+            {"order_type": "limit", "order_id": "Sendlimit:AAPL", "symbol": "AAPL", "side": "B",
+             "quantity": 1, "price": 255.0},
+            {"order_type": "limit", "symbol": "BAD", "side": "B", "error": "Sendlimit rejected"},
+            {"order_type": "market", "order_id": "Sendmarket:AAPL", "symbol": "AAPL", "side": "B",
+             "quantity": 1},
+        ]})
+
+    def test_batch_size_is_capped(self):
+        cap = app_module.ORDER_BATCH_MAX
+        r = self.client.post("/orders/batch", json={"orders": [ORDER] * cap})
+        self.assertEqual((r.status_code, len(r.json()["orders"])), (200, cap))
+
+        r = self.client.post("/orders/batch", json={"orders": [ORDER] * (cap + 1)})
+        self.assertEqual(r.status_code, 422)
+        self.assertEqual(r.json()["detail"], [
+            {"loc": ["body", "orders"], "msg": f"Expected `array` of length <= {cap}", "type": "type_error"}])
+
+    def test_empty_batch(self):
+        self.assertEqual(self.client.post("/orders/batch", json={"orders": []}).json(), {"orders": []})
+
+
+class DrainTaskTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.sterling = _FakeSterling()
+        self.addCleanup(self.sterling.close)
+        patcher = mock.patch.object(app_module, "get_sterling", lambda: self.sterling)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_submit_rejected_once_drain_is_done(self):
+        dead = asyncio.get_running_loop().create_future()
+        dead.cancel()
+        with mock.patch.object(app_module.app.state, "order_drain", dead, create=True), \
+                mock.patch.object(app_module.app.state, "order_queue", asyncio.Queue(), create=True):
+            with self.assertRaisesRegex(RuntimeError, "order queue is not running"):
+                await app_module._submit_order(lambda conn: "never sent")
+            self.assertTrue(app_module.app.state.order_queue.empty())
+
+    async def test_cancel_fails_in_flight_and_queued_orders(self):
+        loop = asyncio.get_running_loop()
+        release = threading.Event()
+        self.addCleanup(release.set)
+        self.sterling.executor.submit(release.wait)
+
+        queue = asyncio.Queue()
+        task = asyncio.create_task(app_module._drain_orders(queue))
+        task.add_done_callback(functools.partial(app_module._drain_stopped, queue))
+        send = lambda conn: "sent"
+        in_flight = [loop.create_future() for _ in range(2)]
+        for fut in in_flight:
+            queue.put_nowait((send, (), fut))
+        while not queue.empty():  # the drain task takes both into one blocked job
+            await asyncio.sleep(0)
+        queued = loop.create_future()
+        queue.put_nowait((send, (), queued))
+
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)  # let the done-callback run
+
+        for fut in in_flight:
+            with self.assertRaisesRegex(RuntimeError, "order queue stopped"):
+                fut.result()
+        with self.assertRaisesRegex(RuntimeError, "order queue is not running"):
+            queued.result()
+
+
+if __name__ == "__main__":
+    unittest.main()
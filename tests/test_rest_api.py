@@ -0,0 +1,49 @@
+import unittest
+
+from fastapi.testclient import TestClient
+
+from connector.rest_api import create_app
+
+
+class _FakeSession:
+    session_id = "s1"
+    accounts = ["A"]
+
+    def __init__(self):
+        self.keys = {"seen": "OID-1"}
+
+    def is_idempotent(self, key):
+        return self.keys.get(key)
+
+
+class _FakeSterling:
+    async def send_market(self, payload):
+        return {"status": "submitted", "orderId": "MKT"}
+
+    async def send_limit(self, payload):
+        return {"status": "submitted", "orderId": "LMT"}
+
+
+class PlaceOrderTest(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(create_app(_FakeSession(), _FakeSterling()))
+
+    def test_replayed_key_is_answered_from_session_state(self):
+        r = self.client.post("/api/place-order", json={"type": "market", "idempotencyKey": "seen"})
+        self.assertEqual(r.json(), {"status": "submitted", "details": "idempotent", "orderId": "OID-1"})
+
+    def test_new_key_reaches_the_connector(self):
+        r = self.client.post("/api/place-order", json={"type": "limit", "idempotencyKey": "new"})
+        self.assertEqual(r.json(), {"status": "submitted", "orderId": "LMT"})
+
+    def test_non_string_key_is_rejected(self):
+        for key in (["a"], {"k": 1}, 5):
+            r = self.client.post("/api/place-order", json={"type": "market", "idempotencyKey": key})
+            self.assertEqual((r.status_code, r.json()), (422, {"detail": "idempotencyKey must be a string"}))
+
+    def test_non_object_body_is_rejected(self):
+        self.assertEqual(self.client.post("/api/place-order", json=[1]).status_code, 422)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import gc
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from connector import session_manager
+
+
+class _FailingConn:
+    """Wraps the writer connection and fails the next ``fail`` executemany calls."""
+
+    def __init__(self, conn, fail=1, on_write=None):
+        self._conn = conn
+        self.fail = fail
+        self.on_write = on_write
+
+    def executemany(self, sql, rows):
+        if self.on_write:
+            self.on_write()
+        if self.fail:
+            self.fail -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return self._conn.executemany(sql, rows)
+
+    def __enter__(self):
+        return self._conn.__enter__()
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class SessionManagerFlushTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        state_dir = Path(tmp.name)
+        for name, value in (("STATE_DIR", state_dir),
+                            ("DB_PATH", state_dir / "connector_state.sqlite"),
+                            # Keep the background flusher idle so each test drives flush() itself.
+                            ("FLUSH_INTERVAL", 3600)):
+            patcher = mock.patch.object(session_manager, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.sm = session_manager.SessionManager()
+        self.addCleanup(self.sm.close)
+
+    def _on_disk(self):
+        with sqlite3.connect(session_manager.DB_PATH) as conn:
+            return dict(conn.execute("SELECT key, result FROM idempotency"))
+
+    def test_failed_flush_is_retried(self):
+        real = self.sm._conn
+        self.sm._conn = _FailingConn(real)
+        self.sm.store_idempotent("k1", "o1")
+        with self.assertRaises(sqlite3.OperationalError):
+            self.sm.flush()
+        self.assertEqual(self.sm.is_idempotent("k1"), "o1")
+
+        self.sm.store_idempotent("k2", "o2")
+        self.sm.flush()
+        self.sm._conn = real
+        self.assertEqual(self._on_disk(), {"k1": "o1", "k2": "o2"})
+
+    def test_newer_result_survives_retry(self):
+        self.sm._conn = _FailingConn(self.sm._conn,
+                                     on_write=lambda: self.sm.store_idempotent("k1", "newer"))
+        self.sm.store_idempotent("k1", "older")
+        with self.assertRaises(sqlite3.OperationalError):
+            self.sm.flush()
+        self.assertEqual(self.sm._pending["k1"][0], "newer")
+
+    def test_close_drains_pending(self):
+        self.sm.store_idempotent("k1", "o1")
+        self.sm.close()
+        self.assertEqual(self._on_disk(), {"k1": "o1"})
+
+    def test_lookup_sees_pending_flushing_and_disk(self):
+        self.sm.store_idempotent("pending", "p")
+        self.sm._idem_cache.clear()
+        self.assertEqual(self.sm.is_idempotent("pending"), "p")
+
+        seen = {}
+
+        def lookup_mid_flush():
+            self.sm._idem_cache.clear()
+            seen["flushing"] = self.sm.is_idempotent("pending")
+
+        self.sm._conn = _FailingConn(self.sm._conn, fail=0, on_write=lookup_mid_flush)
+        self.sm.flush()
+        self.assertEqual(seen, {"flushing": "p"})
+
+        self.sm._idem_cache.clear()
+        self.assertEqual(self.sm.is_idempotent("pending"), "p")
+        self.assertIsNone(self.sm.is_idempotent("missing"))
+
+    def test_reader_closed_when_thread_exits(self):
+        readers = []
+        thread = threading.Thread(target=lambda: readers.append(self.sm._get_reader()))
+        thread.start()
+        thread.join()
+        del thread
+        gc.collect()
+        conn, = readers
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+        self.assertEqual(len(self.sm._reader_conns), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()